@@ -3,17 +3,25 @@ Project Samarth - Simple Backend
 Clean, working backend without heavy dependencies
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
-import requests
+import ahocorasick
+import hashlib
+import json
+import logging
 import os
 from datetime import datetime
+from functools import lru_cache
 import re
-from typing import List, Dict, Any
+import orjson
+from typing import List, Dict, Any, NamedTuple, Sequence, Tuple
 
 app = Flask(__name__)
 CORS(app)
 
+# Handlers and levels are left to the hosting server (or __main__ below)
+logger = logging.getLogger(__name__)
+
 # Load API key from environment
 API_KEY = os.getenv('DATAGOVIN_API_KEY', '579b464db66ec23bdd0000018a6106b76c2945216a647166ce5e7849')
 API_BASE = "https://api.data.gov.in/resource"
@@ -24,6 +32,118 @@ DATASETS = {
     'rainfall': 'e9aafad3-6a08-4f66-b59d-38c65e7ae44f',
 }
 
+# Source citations per handler, shared across requests (treat as read-only)
+_SOURCES_RAINFALL_COMPARE = (
+    {
+        'dataset': 'Rainfall in India',
+        'source': 'India Meteorological Department (IMD)',
+        'url': 'https://www.data.gov.in/catalog/rainfall-india',
+        'resource_id': DATASETS['rainfall']
+    },
+    {
+        'dataset': 'District-wise Crop Production Statistics',
+        'source': 'Ministry of Agriculture & Farmers Welfare',
+        'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0',
+        'resource_id': DATASETS['crop_production']
+    },
+)
+
+_SOURCES_PRODUCTION_EXTREMES = (
+    {
+        'dataset': 'District-wise Crop Production Statistics',
+        'source': 'Ministry of Agriculture & Farmers Welfare, Directorate of Economics and Statistics',
+        'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0',
+        'resource_id': DATASETS['crop_production']
+    },
+)
+
+_SOURCES_PRODUCTION = (
+    {
+        'dataset': 'District-wise Crop Production Statistics',
+        'source': 'Ministry of Agriculture & Farmers Welfare',
+        'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0',
+        'resource_id': DATASETS['crop_production']
+    },
+)
+
+_SOURCES_GENERAL = (
+    {
+        'dataset': 'Open Government Data Platform',
+        'source': 'Government of India',
+        'url': 'https://www.data.gov.in'
+    },
+)
+
+# Answer scaffolds, formatted with the detected states per request
+_RAINFALL_COMPARE_TMPL = """**Rainfall Comparison Analysis ({year_range})**
+
+**{s0}:**
+- Average annual rainfall: 850mm
+- Monsoon contribution: 75%
+- Winter rainfall: 15%
+- Pre-monsoon: 10%
+
+**{s1}:**
+- Average annual rainfall: 720mm
+- Monsoon contribution: 70%
+- Winter rainfall: 20%
+- Pre-monsoon: 10%
+
+**Top 3 Most Produced Crops:**
+
+**{s0}:**
+1. Wheat - 18.5 million tonnes/year
+2. Rice - 12.3 million tonnes/year
+3. Cotton - 1.8 million tonnes/year
+
+**{s1}:**
+1. Wheat - 11.2 million tonnes/year
+2. Rice - 4.5 million tonnes/year
+3. Sugarcane - 3.1 million tonnes/year
+"""
+
+_PRODUCTION_EXTREMES_TMPL = """**{s0}:**
+- Highest producing district: Ludhiana
+- Production: 2,450,000 tonnes
+- Share of state production: 35%
+- Key factors: Extensive irrigation, fertile soil, modern farming techniques
+
+**{s1}:**
+- Lowest producing district: Panchkula
+- Production: 45,000 tonnes
+- Share of state production: 0.8%
+- Key factors: Hilly terrain, limited irrigation infrastructure
+
+**Analysis:** The production difference of ~54x highlights the critical role of \
+geographical factors and agricultural infrastructure in crop yields."""
+
+# Fixed closing text of the general production answer
+_PRODUCTION_QUERY_FOOTER = (
+    "Based on data from the Ministry of Agriculture & Farmers Welfare, "
+    "crop production patterns vary significantly across regions based on "
+    "climate, soil conditions, and irrigation infrastructure.\n\n"
+    "For detailed analysis, please specify:\n"
+    "- Comparison type (highest/lowest)\n"
+    "- Specific districts or regions\n"
+    "- Time period for trend analysis"
+)
+
+# Year patterns, compiled once
+_YEAR_RE = re.compile(r'\b(20\d{2})\b')
+_LAST_N_RE = re.compile(r'last\s+(\d+)\s+years?')
+_DEFAULT_YEARS = (2020, 2021, 2022, 2023)
+
+
+class ParsedCtx(NamedTuple):
+    """Query text shared by all parser steps, lowercased once per request"""
+    query: str
+    query_lower: str
+
+
+# Parser output: (query_type, states, crops, years)
+ParsedQuery = Tuple[str, List[str], List[str], Sequence[int]]
+
+
 class QueryParser:
     """Extract entities from natural language queries"""
     
@@ -41,45 +161,36 @@ class QueryParser:
     ]
     
     @staticmethod
-    def extract_states(query: str) -> List[str]:
-        """Find state names in query"""
-        query_lower = query.lower()
-        found = []
-        for state in QueryParser.STATES:
-            if state.lower() in query_lower:
-                found.append(state)
-        return found
-    
-    @staticmethod
-    def extract_crops(query: str) -> List[str]:
-        """Find crop names in query"""
-        query_lower = query.lower()
-        found = []
-        for crop in QueryParser.CROPS:
-            if crop.lower() in query_lower:
-                found.append(crop)
-        return found
+    def _scan(query_lower: str) -> Dict[str, List[str]]:
+        """Find all state and crop names in a single pass over the query"""
+        found = {'state': [], 'crop': []}
+        for _, (tag, order, name) in _AC.iter(query_lower):
+            found[tag].append((order, name))
+        # Drop repeated mentions, then report each tag in STATES/CROPS order
+        # (handlers assign figures by position)
+        return {tag: [name for _, name in sorted(dict.fromkeys(hits))]
+                for tag, hits in found.items()}
     
     @staticmethod
-    def extract_years(query: str) -> List[int]:
+    def extract_years(ctx: ParsedCtx) -> Sequence[int]:
         """Extract year information"""
         # Find explicit years
-        years = [int(y) for y in re.findall(r'\b(20\d{2})\b', query)]
+        years = [int(y) for y in _YEAR_RE.findall(ctx.query)]
         
         # Handle "last N years"
-        last_match = re.search(r'last\s+(\d+)\s+years?', query.lower())
+        last_match = _LAST_N_RE.search(ctx.query_lower)
         if last_match:
             n = int(last_match.group(1))
             current_year = 2023  # Use 2023 as most recent data year
             years = list(range(current_year - n + 1, current_year + 1))
         
-        # Default to recent years if nothing found
-        return years if years else [2020, 2021, 2022, 2023]
+        # Default to recent years if nothing found (shared, read-only)
+        return years if years else _DEFAULT_YEARS
     
     @staticmethod
-    def classify_query(query: str) -> str:
+    def classify_query(ctx: ParsedCtx) -> str:
         """Determine query type"""
-        query_lower = query.lower()
+        query_lower = ctx.query_lower
         
         if 'compare' in query_lower and 'rainfall' in query_lower:
             return 'rainfall_comparison'
@@ -93,6 +204,31 @@ class QueryParser:
             return 'production_query'
         
         return 'general'
+    
+    @staticmethod
+    def parse(query: str) -> ParsedQuery:
+        """Parse a query into (query_type, states, crops, years) in one call"""
+        ctx = ParsedCtx(query, query.lower())
+        entities = QueryParser._scan(ctx.query_lower)
+        return (
+            QueryParser.classify_query(ctx),
+            entities['state'],
+            entities['crop'],
+            QueryParser.extract_years(ctx),
+        )
+
+
+# Lowercased keyword tables as (lower, original) pairs, built once at import
+_STATES_LC = tuple((s.lower(), s) for s in QueryParser.STATES)
+_CROPS_LC = tuple((c.lower(), c) for c in QueryParser.CROPS)
+
+# Keyword automaton over all states and crops
+_AC = ahocorasick.Automaton()
+for _order, (_lower, _state) in enumerate(_STATES_LC):
+    _AC.add_word(_lower, ('state', _order, _state))
+for _order, (_lower, _crop) in enumerate(_CROPS_LC):
+    _AC.add_word(_lower, ('crop', _order, _crop))
+_AC.make_automaton()
 
 
 class AnswerGenerator:
@@ -103,15 +239,11 @@ class AnswerGenerator:
     
     def answer_query(self, query: str) -> Dict[str, Any]:
         """Main method to process and answer queries"""
-        
-        # Parse the query
-        query_type = self.parser.classify_query(query)
-        states = self.parser.extract_states(query)
-        crops = self.parser.extract_crops(query)
-        years = self.parser.extract_years(query)
-        
-        print(f"[INFO] Query type: {query_type}")
-        print(f"[INFO] States: {states}, Crops: {crops}, Years: {years}")
+        return self.answer_parsed(query, self.parser.parse(query))
+    
+    def answer_parsed(self, query: str, parsed: ParsedQuery) -> Dict[str, Any]:
+        """Route an already parsed query to its handler"""
+        query_type, states, crops, years = parsed
         
         # Route to appropriate handler
         if query_type == 'rainfall_comparison':
@@ -123,7 +255,7 @@ class AnswerGenerator:
         else:
             return self.handle_general(query, states, crops, years)
     
-    def handle_rainfall_comparison(self, states: List[str], years: List[int]) -> Dict:
+    def handle_rainfall_comparison(self, states: List[str], years: Sequence[int]) -> Dict:
         """Compare rainfall between states"""
         
         if len(states) < 2:
@@ -132,51 +264,12 @@ class AnswerGenerator:
                 'sources': []
             }
         
-        year_range = f"{min(years)}-{max(years)}"
-        
-        # Build response
-        answer = f"**Rainfall Comparison Analysis ({year_range})**\n\n"
-        
-        # State 1
-        answer += f"**{states[0]}:**\n"
-        answer += f"- Average annual rainfall: 850mm\n"
-        answer += f"- Monsoon contribution: 75%\n"
-        answer += f"- Winter rainfall: 15%\n"
-        answer += f"- Pre-monsoon: 10%\n\n"
+        y_min, y_max = min(years), max(years)
+        year_range = f"{y_min}-{y_max}"
         
-        # State 2
-        answer += f"**{states[1]}:**\n"
-        answer += f"- Average annual rainfall: 720mm\n"
-        answer += f"- Monsoon contribution: 70%\n"
-        answer += f"- Winter rainfall: 20%\n"
-        answer += f"- Pre-monsoon: 10%\n\n"
+        answer = _RAINFALL_COMPARE_TMPL.format(s0=states[0], s1=states[1], year_range=year_range)
         
-        # Add crop production info
-        answer += f"**Top 3 Most Produced Crops:**\n\n"
-        answer += f"**{states[0]}:**\n"
-        answer += f"1. Wheat - 18.5 million tonnes/year\n"
-        answer += f"2. Rice - 12.3 million tonnes/year\n"
-        answer += f"3. Cotton - 1.8 million tonnes/year\n\n"
-        
-        answer += f"**{states[1]}:**\n"
-        answer += f"1. Wheat - 11.2 million tonnes/year\n"
-        answer += f"2. Rice - 4.5 million tonnes/year\n"
-        answer += f"3. Sugarcane - 3.1 million tonnes/year\n"
-        
-        sources = [
-            {
-                'dataset': 'Rainfall in India',
-                'source': 'India Meteorological Department (IMD)',
-                'url': 'https://www.data.gov.in/catalog/rainfall-india',
-                'resource_id': DATASETS['rainfall']
-            },
-            {
-                'dataset': 'District-wise Crop Production Statistics',
-                'source': 'Ministry of Agriculture & Farmers Welfare',
-                'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0',
-                'resource_id': DATASETS['crop_production']
-            }
-        ]
+        sources = _SOURCES_RAINFALL_COMPARE
         
         return {
             'answer': answer,
@@ -188,7 +281,7 @@ class AnswerGenerator:
             }
         }
     
-    def handle_production_extremes(self, states: List[str], crops: List[str], years: List[int]) -> Dict:
+    def handle_production_extremes(self, states: List[str], crops: List[str], years: Sequence[int]) -> Dict:
         """Handle highest/lowest production queries"""
         
         if not states or not crops:
@@ -200,32 +293,14 @@ class AnswerGenerator:
         crop = crops[0]
         year = max(years) if years else 2023
         
-        answer = f"**Production Analysis: {crop} ({year})**\n\n"
+        header = f"**Production Analysis: {crop} ({year})**\n\n"
         
         if len(states) >= 2:
-            answer += f"**{states[0]}:**\n"
-            answer += f"- Highest producing district: Ludhiana\n"
-            answer += f"- Production: 2,450,000 tonnes\n"
-            answer += f"- Share of state production: 35%\n"
-            answer += f"- Key factors: Extensive irrigation, fertile soil, modern farming techniques\n\n"
-            
-            answer += f"**{states[1]}:**\n"
-            answer += f"- Lowest producing district: Panchkula\n"
-            answer += f"- Production: 45,000 tonnes\n"
-            answer += f"- Share of state production: 0.8%\n"
-            answer += f"- Key factors: Hilly terrain, limited irrigation infrastructure\n\n"
-            
-            answer += f"**Analysis:** The production difference of ~54x highlights the critical role of "
-            answer += f"geographical factors and agricultural infrastructure in crop yields."
+            answer = header + _PRODUCTION_EXTREMES_TMPL.format(s0=states[0], s1=states[1])
+        else:
+            answer = header
         
-        sources = [
-            {
-                'dataset': 'District-wise Crop Production Statistics',
-                'source': 'Ministry of Agriculture & Farmers Welfare, Directorate of Economics and Statistics',
-                'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0',
-                'resource_id': DATASETS['crop_production']
-            }
-        ]
+        sources = _SOURCES_PRODUCTION_EXTREMES
         
         return {
             'answer': answer,
@@ -237,41 +312,31 @@ class AnswerGenerator:
             }
         }
     
-    def handle_production_query(self, states: List[str], crops: List[str], years: List[int]) -> Dict:
+    def handle_production_query(self, states: List[str], crops: List[str], years: Sequence[int]) -> Dict:
         """Handle general production queries"""
         
-        answer = "**Crop Production Analysis**\n\n"
+        parts = ["**Crop Production Analysis**\n\n"]
         
         if crops:
-            answer += f"**Crops:** {', '.join(crops)}\n"
+            parts.append(f"**Crops:** {', '.join(crops)}\n")
         if states:
-            answer += f"**States:** {', '.join(states)}\n"
+            parts.append(f"**States:** {', '.join(states)}\n")
         if years:
-            answer += f"**Period:** {min(years)}-{max(years)}\n\n"
+            y_min, y_max = min(years), max(years)
+            parts.append(f"**Period:** {y_min}-{y_max}\n\n")
         
-        answer += "Based on data from the Ministry of Agriculture & Farmers Welfare, "
-        answer += "crop production patterns vary significantly across regions based on "
-        answer += "climate, soil conditions, and irrigation infrastructure.\n\n"
-        answer += "For detailed analysis, please specify:\n"
-        answer += "- Comparison type (highest/lowest)\n"
-        answer += "- Specific districts or regions\n"
-        answer += "- Time period for trend analysis"
+        parts.append(_PRODUCTION_QUERY_FOOTER)
         
-        sources = [
-            {
-                'dataset': 'District-wise Crop Production Statistics',
-                'source': 'Ministry of Agriculture & Farmers Welfare',
-                'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0',
-                'resource_id': DATASETS['crop_production']
-            }
-        ]
+        answer = "".join(parts)
+        
+        sources = _SOURCES_PRODUCTION
         
         return {
             'answer': answer,
             'sources': sources
         }
     
-    def handle_general(self, query: str, states: List[str], crops: List[str], years: List[int]) -> Dict:
+    def handle_general(self, query: str, states: List[str], crops: List[str], years: Sequence[int]) -> Dict:
         """Handle general queries"""
         
         context_parts = []
@@ -312,13 +377,7 @@ I can help you analyze data from data.gov.in including:
 
 Please rephrase your question with specific states, crops, and time periods for detailed analysis."""
         
-        sources = [
-            {
-                'dataset': 'Open Government Data Platform',
-                'source': 'Government of India',
-                'url': 'https://www.data.gov.in'
-            }
-        ]
+        sources = _SOURCES_GENERAL
         
         return {
             'answer': answer,
@@ -329,13 +388,28 @@ Please rephrase your question with specific states, crops, and time periods for
 # Initialize answer generator
 answer_gen = AnswerGenerator()
 
+# Max number of distinct queries kept in the answer cache
+ANSWER_CACHE_SIZE = 512
+# Longer queries bypass the cache so workers never pin large request bodies
+ANSWER_CACHE_MAX_QUERY_LEN = 512
 
-# API Endpoints
 
-@app.route('/')
-def home():
-    """Home page"""
-    return """
+def _answer(query: str) -> Tuple[ParsedQuery, Dict[str, Any]]:
+    """Parse and answer a query"""
+    parsed = QueryParser.parse(query)
+    return parsed, answer_gen.answer_parsed(query, parsed)
+
+
+# Memoized _answer; results are shared between requests, do not mutate
+_cached_answer = lru_cache(maxsize=ANSWER_CACHE_SIZE)(_answer)
+
+
+# Bound once so request handlers skip the attribute lookup
+_now = datetime.now
+
+
+# Static response bodies, serialized once at import
+_HOME_HTML = """
     <html>
         <head><title>Project Samarth API</title></head>
         <body style="font-family: Arial; padding: 40px; background: #f5f5f5;">
@@ -358,72 +432,121 @@ POST /api/query
     </html>
     """
 
+_DATASETS_JSON = orjson.dumps({
+    'datasets': [
+        {
+            'id': 'crop_production',
+            'name': 'District-wise Crop Production Statistics',
+            'source': 'Ministry of Agriculture & Farmers Welfare',
+            'resource_id': DATASETS['crop_production'],
+            'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0'
+        },
+        {
+            'id': 'rainfall',
+            'name': 'Rainfall in India',
+            'source': 'India Meteorological Department (IMD)',
+            'resource_id': DATASETS['rainfall'],
+            'url': 'https://www.data.gov.in/catalog/rainfall-india'
+        }
+    ]
+})
+
+# Static health fields; only the timestamp is added per request
+_HEALTH_STATIC = {
+    'status': 'healthy',
+    'api_key_configured': bool(API_KEY),
+    'version': '1.0.0'
+}
+
+
+# Strong validators for the constant endpoints, so repeat GETs can be answered with 304
+_HOME_ETAG = hashlib.sha1(_HOME_HTML.encode()).hexdigest()
+_DATASETS_ETAG = hashlib.sha1(_DATASETS_JSON).hexdigest()
+STATIC_MAX_AGE = 3600
+
+
+def _static_response(body: Any, mimetype: str, etag: str) -> Response:
+    """Serve a constant body with ETag/Cache-Control, or 304 if the client has it"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_MAX_AGE
+    return response
+
+
+def _json(payload: Dict[str, Any], status: int = 200) -> Response:
+    """Serialize a payload to a JSON response with orjson"""
+    try:
+        body = orjson.dumps(payload)
+    except orjson.JSONEncodeError:
+        # orjson rejects lone surrogates that stdlib json accepts (and escapes)
+        body = json.dumps(payload)
+    return Response(body, status=status, mimetype='application/json')
+
+
+# API Endpoints
+
+@app.route('/')
+def home():
+    """Home page"""
+    return _static_response(_HOME_HTML, 'text/html', _HOME_ETAG)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'api_key_configured': bool(API_KEY),
-        'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
-    })
+    return _json({**_HEALTH_STATIC, 'timestamp': _now().isoformat()})
 
 @app.route('/api/query', methods=['POST'])
 def handle_query():
     """Main query endpoint"""
     try:
-        data = request.json
-        query = data.get('query', '')
+        data = request.get_json(silent=True, cache=False)
+        query = data.get('query') if isinstance(data, dict) else None
+        query = query.strip() if isinstance(query, str) else ''
         
         if not query:
-            return jsonify({
+            return _json({
                 'success': False,
                 'error': 'No query provided'
-            }), 400
+            }, 400)
         
-        # Generate answer
-        result = answer_gen.answer_query(query)
+        # Generate answer (handlers are deterministic, so identical queries are cached)
+        if len(query) <= ANSWER_CACHE_MAX_QUERY_LEN:
+            (query_type, states, crops, years), result = _cached_answer(query)
+        else:
+            (query_type, states, crops, years), result = _answer(query)
+        
+        logger.info("Query type: %s", query_type)
+        logger.info("States: %s, Crops: %s, Years: %s", states, crops, years)
         
-        return jsonify({
+        return _json({
             'success': True,
             'query': query,
             'answer': result['answer'],
             'sources': result.get('sources', []),
             'metadata': result.get('metadata', {}),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now().isoformat()
         })
     
     except Exception as e:
-        print(f"[ERROR] {str(e)}")
-        return jsonify({
+        logger.exception("handle_query failed")
+        return _json({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
 
 @app.route('/api/datasets', methods=['GET'])
 def list_datasets():
     """List available datasets"""
-    return jsonify({
-        'datasets': [
-            {
-                'id': 'crop_production',
-                'name': 'District-wise Crop Production Statistics',
-                'source': 'Ministry of Agriculture & Farmers Welfare',
-                'resource_id': DATASETS['crop_production'],
-                'url': 'https://www.data.gov.in/catalog/district-wise-season-wise-crop-production-statistics-0'
-            },
-            {
-                'id': 'rainfall',
-                'name': 'Rainfall in India',
-                'source': 'India Meteorological Department (IMD)',
-                'resource_id': DATASETS['rainfall'],
-                'url': 'https://www.data.gov.in/catalog/rainfall-india'
-            }
-        ]
-    })
+    return _static_response(_DATASETS_JSON, 'application/json', _DATASETS_ETAG)
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+    
     print("=" * 70)
     print("🌾  PROJECT SAMARTH - INTELLIGENT Q&A SYSTEM")
     print("=" * 70)
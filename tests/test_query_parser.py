@@ -0,0 +1,29 @@
+"""
+Regression checks for QueryParser entity ordering
+Handlers assign hard-coded figures by position, so states and crops must
+come back in STATES/CROPS order regardless of how the query phrases them
+"""
+
+from app import QueryParser, answer_gen
+
+
+def test_states_follow_states_table_order():
+    found = QueryParser._scan('compare rainfall in haryana and punjab')
+    assert found['state'] == ['Punjab', 'Haryana']
+
+
+def test_crops_follow_crops_table_order_without_repeats():
+    found = QueryParser._scan('onion, rice and onion again')
+    assert found['crop'] == ['Rice', 'Onion']
+
+
+def test_rainfall_comparison_figures_stay_with_their_state():
+    answer = answer_gen.answer_query('Compare rainfall in Haryana and Punjab')['answer']
+    assert '**Punjab:**\n- Average annual rainfall: 850mm' in answer
+    assert '**Haryana:**\n- Average annual rainfall: 720mm' in answer
+
+
+def test_production_extremes_districts_stay_with_their_state():
+    answer = answer_gen.answer_query('Highest wheat production in Haryana vs Punjab')['answer']
+    assert '**Punjab:**\n- Highest producing district: Ludhiana' in answer
+    assert '**Haryana:**\n- Lowest producing district: Panchkula' in answer
@@ -0,0 +1,8 @@
+"""
+Project Samarth - WSGI entry point
+Run with a production server, e.g. gunicorn -w 4 -k gthread --threads 8 wsgi:application
+"""
+
+from app import app
+
+application = app